@@ -1,2 +1,2 @@
-from .dlna_device import devices, get_device_by_uuid, get_device_data
+from .dlna_device import add_device, devices, get_device_by_uuid, get_device_data
 from .discover import DlnaDiscover
@@ -7,6 +7,8 @@ import socket
 from asyncio.protocols import DatagramProtocol
 from asyncio.transports import DatagramTransport
 from dataclasses import dataclass, field
+from email.parser import BytesParser
+from email.policy import compat32
 from typing import Awaitable, Callable, Type
 
 from ..settings import settings
@@ -26,9 +28,33 @@ SSDP_BROADCAST_PARAMS = [
     "",
 ]
 SSDP_BROADCAST_MSG = "\r\n".join(SSDP_BROADCAST_PARAMS)
+SSDP_BROADCAST_BYTES = SSDP_BROADCAST_MSG.encode("UTF-8")
+SSDP_TARGET = (SSDP_BROADCAST_ADDR, SSDP_BROADCAST_PORT)
 
 
 SEND_INTERVAL_SECS = 30
+SSDP_RECV_BUFFER_SIZE = 1 << 20
+LOCATION_QUEUE_SIZE = 1024
+MAX_CONCURRENT_DEVICE_FETCHES = 4
+
+SSDP_LOCATION_HEADER = b"\r\nlocation:"
+SSDP_HEADER_PARSER = BytesParser(policy=compat32)
+
+
+def parse_ssdp_location(data: bytes) -> str | None:
+    low = data.lower()
+    start = low.find(SSDP_LOCATION_HEADER)
+    if start != -1:
+        start += len(SSDP_LOCATION_HEADER)
+        end = data.find(b"\r\n", start)
+        if end == -1:
+            end = len(data)
+        return data[start:end].strip().decode("ascii")
+
+    headers = SSDP_HEADER_PARSER.parsebytes(data.partition(b"\n")[2])
+    if (location_url := headers.get("location")) is None:
+        return None
+    return location_url.strip()
 
 
 def get_protocol(discover: DlnaDiscover) -> Type[DatagramProtocol]:
@@ -50,18 +76,14 @@ def get_protocol(discover: DlnaDiscover) -> Type[DatagramProtocol]:
             if not self.transport:
                 raise Exception("transport not set")
             while self.is_connected:
-                self.transport.sendto(
-                    SSDP_BROADCAST_MSG.encode("UTF-8"),
-                    (SSDP_BROADCAST_ADDR, SSDP_BROADCAST_PORT),
-                )
+                self.transport.sendto(SSDP_BROADCAST_BYTES, SSDP_TARGET)
                 await asyncio.sleep(SEND_INTERVAL_SECS)
 
         def datagram_received(self, data: bytes, addr: tuple[str, int]):
-            info = [a.split(":", 1) for a in data.decode("UTF-8").split("\r\n")[1:]]
-            device = dict(
-                [(a[0].strip().lower(), a[1].strip()) for a in info if len(a) >= 2]
-            )
-            asyncio.create_task(discover.on_new_device(device["location"]))
+            location_url = parse_ssdp_location(data)
+            if location_url is None:
+                return
+            discover.queue_location(location_url)
 
         def error_received(self, exc: Exception):
             logging.error("Error received:", exc)
@@ -80,14 +102,29 @@ def get_protocol(discover: DlnaDiscover) -> Type[DatagramProtocol]:
 class DlnaDiscover:
     new_device_callback: Callable[[str], Awaitable[None]]
 
-    device_locations: list[str] = field(default_factory=list, init=False)
+    device_locations: set[str] = field(default_factory=set, init=False)
     protocol: DatagramProtocol | None = field(default=None, init=False)
     socket: socket.socket | None = field(default=None, init=False)
+    location_queue: asyncio.Queue[str] | None = field(default=None, init=False)
+    fetch_semaphore: asyncio.Semaphore | None = field(default=None, init=False)
 
     async def on_new_device(self, location_url: str):
         if location_url not in self.device_locations:
-            self.device_locations.append(location_url)
-            await self.new_device_callback(location_url)
+            self.device_locations.add(location_url)
+            async with self.fetch_semaphore:
+                await self.new_device_callback(location_url)
+
+    def queue_location(self, location_url: str):
+        try:
+            self.location_queue.put_nowait(location_url)
+        except asyncio.QueueFull:
+            logger.debug("dlna discover queue full, drop %s", location_url)
+
+    async def consume_locations(self):
+        while True:
+            location_url = await self.location_queue.get()
+            if location_url not in self.device_locations:
+                asyncio.create_task(self.on_new_device(location_url))
 
     def init_socket(self):
         self.socket = socket.socket(
@@ -95,10 +132,18 @@ class DlnaDiscover:
         )
         try:
             self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            if hasattr(socket, "SO_REUSEPORT"):
+                self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
         except Exception as e:
             logging.warning("socket reuse failed %s", e)
 
         self.socket.bind(("", SSDP_BROADCAST_PORT + 10))
+        try:
+            self.socket.setsockopt(
+                socket.SOL_SOCKET, socket.SO_RCVBUF, SSDP_RECV_BUFFER_SIZE
+            )
+        except Exception as e:
+            logging.warning("socket receive buffer resize failed %s", e)
         self.socket.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 4)
         self.socket.setsockopt(
             socket.IPPROTO_IP,
@@ -108,10 +153,13 @@ class DlnaDiscover:
         self.socket.setblocking(False)
 
     async def discover(self, loop: AbstractEventLoop | None = None):
+        self.fetch_semaphore = asyncio.Semaphore(MAX_CONCURRENT_DEVICE_FETCHES)
         if settings.location_url is not None and len(settings.location_url) > 0:
             await self.on_new_device(settings.location_url)
             return
         self.init_socket()
+        self.location_queue = asyncio.Queue(maxsize=LOCATION_QUEUE_SIZE)
+        asyncio.create_task(self.consume_locations())
         if loop is None:
             loop = asyncio.get_running_loop()
         await loop.create_datagram_endpoint(get_protocol(self), sock=self.socket)
@@ -2,11 +2,10 @@ from __future__ import annotations
 
 import asyncio
 import logging
-import re
 import traceback
 from dataclasses import InitVar, dataclass, field, fields
-from datetime import datetime, timedelta
-from typing import TYPE_CHECKING, TypedDict
+from functools import lru_cache, partial
+from typing import TYPE_CHECKING, Callable, TypedDict
 from urllib.parse import urljoin, urlparse
 
 import aiohttp
@@ -22,6 +21,9 @@ from ..utils import (
     UPNP_RC_SERVICE_TYPE,
     UPNP_RC_SERVICE_TYPE_PREFIX,
     g,
+    parse_root,
+    parse_scpd,
+    volume_converter,
     xml2dict,
 )
 from .models.service import Action, StateVariable
@@ -52,7 +54,23 @@ USER_AGENT = f"{__file__}/1.0"
 
 ERROR_COUNT_TO_REMOVE = 20
 
+XML_ESCAPE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"})
+
+SERVICE_TYPE_PREFIXES = {
+    UPNP_AVT_SERVICE_TYPE_PREFIX: ("avt", frozenset(ALLOWED_UPNP_AVT_VERSIONS)),
+    UPNP_RC_SERVICE_TYPE_PREFIX: ("rc", frozenset(ALLOWED_UPNP_RC_VERSIONS)),
+}
+
 devices: list[DlnaDevice] = []
+_devices_by_uuid: dict[str, DlnaDevice] = {}
+
+
+@lru_cache(maxsize=256)
+def build_payload(action: str, urn: str, items: tuple[tuple[str, str], ...]) -> bytes:
+    fields = "".join(
+        f"<{tag}>{str(value).translate(XML_ESCAPE)}</{tag}>" for tag, value in items
+    )
+    return PAYLOAD_FMT.format(action=action, urn=urn, fields=fields).encode()
 
 
 @dataclass
@@ -67,23 +85,22 @@ class DlnaDeviceService:
     urn: str = field(init=False)
     subscribed: bool = field(default=False, init=False)
     _spec_info: SCPDRoot | None = field(default=None, init=False)
-    next_subscribe_call_time: datetime | None = field(default=None, init=False)
+    _spec_lock: asyncio.Lock = field(default_factory=asyncio.Lock, init=False)
+    next_subscribe_call_time: float | None = field(default=None, init=False)
+    _subscribe_headers: dict[str, str] = field(default_factory=dict, init=False)
+    _subscribe_host_ip: str | None = field(default=None, init=False)
 
     actions: dict[str, Action] = field(default_factory=dict, init=False)
 
     def __post_init__(self, service_dict: Service):
         self.service_type = service_dict["serviceType"]
-        self.control_url = urljoin(self.device.location_url, service_dict["controlURL"])
-        self.event_url = urljoin(self.device.location_url, service_dict["eventSubURL"])
-        self.spec_url = urljoin(self.device.location_url, service_dict["SCPDURL"])
+        self.control_url = self.device.resolve_url(service_dict["controlURL"])
+        self.event_url = self.device.resolve_url(service_dict["eventSubURL"])
+        self.spec_url = self.device.resolve_url(service_dict["SCPDURL"])
         self.urn = self.service_type
 
-    def payload_from_template(self, action: str, data: dict[str, str]) -> str:
-        fields = ""
-        for tag, value in data.items():
-            fields += "<{tag}>{value}</{tag}>".format(tag=tag, value=value)
-        payload = PAYLOAD_FMT.format(action=action, urn=self.urn, fields=fields)
-        return payload
+    def payload_from_template(self, action: str, data: dict[str, str]) -> bytes:
+        return build_payload(action, self.urn, tuple(data.items()))
 
     async def control(
         self,
@@ -134,14 +151,14 @@ class DlnaDeviceService:
         try:
             async with client.post(
                 self.control_url,
-                data=payload.encode(),
+                data=payload,
                 headers=headers,
                 timeout=10,
             ) as response:
                 response.raise_for_status()
 
                 self.device.repeat_error_count = 0
-                info = xml2dict(await response.text())
+                info = xml2dict(await response.text(), as_dotmap=True)
                 error = info.Envelope.Body.Fault.detail.UPnPError.get(
                     "errorDescription"
                 )
@@ -187,32 +204,35 @@ class DlnaDeviceService:
             logger.warning("dlna subscribe no host ip")
             return False
 
+        loop = asyncio.get_running_loop()
         if self.next_subscribe_call_time is not None:
-            if datetime.utcnow() < self.next_subscribe_call_time:
+            if loop.time() < self.next_subscribe_call_time:
                 return None
 
-        headers = {
-            "Cache-Control": "no-cache",
-            "User-Agent": USER_AGENT,
-            "NT": "upnp:event",
-            "Callback": f"<http://{settings.host_ip}:{settings.http_port}/dlna/callback/{self.device.uuid}>",
-            "Timeout": f"Second-{timeout_sec}",
-        }
+        if self._subscribe_host_ip != settings.host_ip:
+            self._subscribe_headers = {
+                "Cache-Control": "no-cache",
+                "User-Agent": USER_AGENT,
+                "NT": "upnp:event",
+                "Callback": f"<http://{settings.host_ip}:{settings.http_port}/dlna/callback/{self.device.uuid}>",
+            }
+            self._subscribe_host_ip = settings.host_ip
+        headers = self._subscribe_headers
+        headers["Timeout"] = f"Second-{timeout_sec}"
         logger.info("Subscribe DLNA device %s %s", self.device.name, self.service_type)
 
+        started = loop.time()
         async with g.http.request(
             "SUBSCRIBE", self.event_url, headers=headers
         ) as response:
-            if response.ok:
-                logging.info(
-                    "DLNA device %s %s subscribed", self.device.name, self.service_type
-                )
-                self.next_subscribe_call_time = datetime.utcnow() + timedelta(
-                    seconds=(timeout_sec // 2)
-                )
-                return True
-            else:
-                return False
+            subscribed = response.ok
+
+        if subscribed:
+            logging.info(
+                "DLNA device %s %s subscribed", self.device.name, self.service_type
+            )
+            self.next_subscribe_call_time = started + timeout_sec // 2
+        return subscribed
 
     async def get_spec(self, client: aiohttp.ClientSession | None = None) -> SCPDRoot:
         if self._spec_info is not None:
@@ -221,13 +241,17 @@ class DlnaDeviceService:
         if client is None:
             client = g.http
 
-        logger.info("DLNA device %s %s get spec", self.device.name, self.service_type)
+        async with self._spec_lock:
+            if self._spec_info is not None:
+                return self._spec_info
+
+            logger.info(
+                "DLNA device %s %s get spec", self.device.name, self.service_type
+            )
 
-        async with client.get(self.spec_url) as response:
-            response.raise_for_status()
-            xml = re.sub(' xmlns="[^"]+"', "", await response.text(), count=1)
-            info: SCPDRoot = xml2dict(xml)
-            self._spec_info = info
+            async with client.get(self.spec_url) as response:
+                response.raise_for_status()
+                self._spec_info = parse_scpd(await response.read())
 
         return self._spec_info
 
@@ -245,11 +269,8 @@ class DlnaDeviceService:
         if action := self.actions.get(action_name):
             return action
 
-        for action in await self.get_actions(client=client):
-            if action["name"] == action_name:
-                return action
-            else:
-                return None
+        await self.get_actions(client=client)
+        return self.actions.get(action_name)
 
     async def get_state_variables(self) -> list[StateVariable]:
         spec: SCPDRoot = await self.get_spec()
@@ -328,6 +349,8 @@ class DlnaDevice:
     volume_max: int | None = field(default=None, init=False)
     volume_min: int | None = field(default=None, init=False)
     volume_step: int | None = field(default=None, init=False)
+    volume_to_plex: Callable[[int], int] | None = field(default=None, init=False)
+    volume_from_plex: Callable[[int], int] | None = field(default=None, init=False)
     uuid: str | None = field(default=None, init=False)
     loop: asyncio.AbstractEventLoop = field(
         default_factory=asyncio.get_running_loop, init=False
@@ -339,7 +362,16 @@ class DlnaDevice:
     avt_service_type_version: int = field(init=False)
     rc_service_type_version: int = field(init=False)
 
-    actions: dict[str, DlnaDeviceCommand] = field(default_factory=dict, init=False)
+    actions: dict[str, partial] = field(default_factory=dict, init=False)
+
+    _url_base: str = field(default="", init=False)
+
+    def resolve_url(self, url: str | None) -> str:
+        if not url:
+            return urljoin(self.location_url, url)
+        if url.startswith("/") and not url.startswith("//") and "/." not in url:
+            return self._url_base + url
+        return urljoin(self.location_url, url)
 
     async def get_data(self):
         if self.info:
@@ -347,33 +379,31 @@ class DlnaDevice:
 
         async with g.http.get(self.location_url) as response:
             if response.ok:
-                xml = await response.text()
-                xml = re.sub(' xmlns="[^"]+"', "", xml, count=1)
-                info: Root = xml2dict(xml)
-                info = info["root"]
-                self.info = info
+                self.info = parse_root(await response.read())
 
         if self.info:
             self.name = self.info["device"]["friendlyName"]
             self.model = self.info["device"].get("modelDescription", settings.product)
             self.uuid = self.info["device"]["UDN"].removeprefix("uuid:")
 
+            url = urlparse(self.location_url)
+            self._url_base = f"{url.scheme}://{url.netloc}"
             for service in self.info["device"]["serviceList"]["service"]:
                 service_type = service["serviceType"]
                 self.services[service_type] = DlnaDeviceService(service, self)
-                await self.services[service_type].get_actions()
+            await asyncio.gather(*[s.get_actions() for s in self.services.values()])
 
+            for service_type in self.services:
                 prefix, suffix = service_type.rsplit(":", 1)
-                if (
-                    prefix == UPNP_AVT_SERVICE_TYPE_PREFIX
-                    and suffix in ALLOWED_UPNP_AVT_VERSIONS
-                ):
+                if (entry := SERVICE_TYPE_PREFIXES.get(prefix)) is None:
+                    continue
+                kind, allowed_versions = entry
+                if suffix not in allowed_versions:
+                    continue
+                if kind == "avt":
                     self.avt_service_type = service_type
                     self.avt_service_type_version = int(suffix)
-                elif (
-                    prefix == UPNP_RC_SERVICE_TYPE_PREFIX
-                    and suffix in ALLOWED_UPNP_RC_VERSIONS
-                ):
+                else:
                     self.rc_service_type = service_type
                     self.rc_service_type_version = int(suffix)
 
@@ -389,7 +419,6 @@ class DlnaDevice:
         self.ip = url.hostname
         self.name = settings.dlna_name_alias(self.uuid, self.name, self.ip)
         await self.get_volume_info()
-        await asyncio.gather(*[s.get_spec() for s in self.services.values()])
 
     async def _find_service_by_action(self, action):
         await self.get_data()
@@ -400,12 +429,12 @@ class DlnaDevice:
 
     def __getattr__(self, item):
         """Get attribute or action."""
-        if item in self.__dict__:
-            return self.__dict__[item]
-
-        def action(data: dict | None = {}, client: aiohttp.ClientSession | None = None):
-            return self.action(item, data=data or {}, client=client)
+        if item.startswith("_"):
+            raise AttributeError(item)
 
+        actions = self.__dict__.setdefault("actions", {})
+        if (action := actions.get(item)) is None:
+            action = actions[item] = partial(self.action, item)
         return action
 
     # def GetPositionInfo(
@@ -451,10 +480,13 @@ class DlnaDevice:
         if service.subscribed:
             return
 
+        loop = asyncio.get_running_loop()
         service.subscribed = True
         while service.subscribed:
+            retry_at = loop.time() + timeout_sec // 2
             await self.subscribe(service_type=service_type, timeout_sec=timeout_sec)
-            await asyncio.sleep(timeout_sec // 2)
+            wake_at = max(retry_at, service.next_subscribe_call_time or 0)
+            await asyncio.sleep(max(0, wake_at - loop.time()))
 
     def stop_subscribe(self, service_type: str | None = None):
         service = self._get_service(service_type or self.avt_service_type)
@@ -480,8 +512,21 @@ class DlnaDevice:
         except Exception:
             logger.exception("get volume info error for %s", self.name)
 
+        self.volume_to_plex = volume_converter(
+            self.volume_max, self.volume_min, 100, 0, 1
+        )
+        self.volume_from_plex = volume_converter(
+            100, 0, self.volume_max, self.volume_min, self.volume_step
+        )
+
     async def remove_self(self):
         devices.remove(self)
+        if _devices_by_uuid.get(self.uuid) is self:
+            del _devices_by_uuid[self.uuid]
+            for device in devices:
+                if device.uuid == self.uuid:
+                    _devices_by_uuid[self.uuid] = device
+                    break
 
         from plex.adapters import adapter_by_device, remove_adapter
         from plex.subscribe import sub_man
@@ -506,8 +551,15 @@ class DlnaDevice:
         return f"DLNA Device {self.name} {self.ip} {self.uuid}>"
 
     def __eq__(self, other):
+        if not isinstance(other, DlnaDevice):
+            return NotImplemented
+        if self.uuid is None or other.uuid is None:
+            return self is other
         return self.uuid == other.uuid
 
+    def __hash__(self):
+        return hash(self.uuid)
+
 
 # if settings.location_url is not None:
 #     devices.append(DlnaDevice(settings.location_url))
@@ -517,10 +569,14 @@ async def get_device_data():
     await asyncio.gather(*[device.get_data() for device in devices])
 
 
+def add_device(device: DlnaDevice):
+    devices.append(device)
+    _devices_by_uuid[device.uuid] = device
+
+
 async def get_device_by_uuid(uuid: str) -> DlnaDevice | None:
-    for device in devices:
-        if device.uuid == uuid:
-            await device.get_data()
-            return device
+    if (device := _devices_by_uuid.get(uuid)) is not None:
+        await device.get_data()
+        return device
     logger.info("device uuid not found %s", uuid)
     return None
@@ -24,11 +24,18 @@ class AllowedValue(TypedDict):
     allowedValue: str
 
 
+class AllowedValueRange(TypedDict):
+    minimum: str
+    maximum: str
+    step: str | None
+
+
 class StateVariable(TypedDict):
     name: str
     sendEvents: str
     dataType: str
     allowedValuelist: list[AllowedValue] | None
+    allowedValueRange: AllowedValueRange | None
 
 
 class StateVariableList(TypedDict):
@@ -15,7 +15,7 @@ from starlette.datastructures import QueryParams
 
 from .play_queue import PlayQueue
 from ..settings import settings
-from ..utils import convert_volume, g, parse_timedelta, pms_header
+from ..utils import g, parse_timedelta, pms_header
 from .play_queue import TrackInfo
 
 logger = logging.getLogger(__name__)
@@ -264,9 +264,7 @@ class DlnaState(object):
         if volume and volume.result:
             volume = volume.result
             volume = int(volume.CurrentVolume)
-            self.volume = convert_volume(
-                volume, self.dlna.volume_max, self.dlna.volume_min, 100, 0, 1
-            )
+            self.volume = self.dlna.volume_to_plex(volume)
         if muted and muted.result:
             muted = muted.result
             self.muted = muted.CurrentMute
@@ -427,19 +425,19 @@ class PlexDlnaAdapter:
                 changed.elapsed
                 == 0
                 < changed.old.elapsed
-                <= self.current_track_info.duration
-                and self.current_track_info.duration - changed.old.elapsed <= 2000
+                <= self.current_track_info["duration"]
+                and self.current_track_info["duration"] - changed.old.elapsed <= 2000
             ) or (
                 changed.elapsed
                 and changed.elapsed > changed.old.elapsed
-                and self.current_track_info.duration // 1000 * 1000
+                and self.current_track_info["duration"] // 1000 * 1000
                 <= changed.elapsed
-                <= self.current_track_info.duration
+                <= self.current_track_info["duration"]
             ):
                 self.no_notice = True
                 logger.info("auto next stopped %s", self.state.state)
                 logger.info("Elapsed %s", changed.elapsed)
-                logger.info("Duration %s", self.current_track_info.duration)
+                logger.info("Duration %s", self.current_track_info["duration"])
                 self.state.update(state="TRANSITIONING", uri=None)
                 asyncio.run_coroutine_threadsafe(auto_next(), self.loop)
                 self.no_notice = False
@@ -523,6 +521,8 @@ class PlexDlnaAdapter:
         if query_params is not None:
             self.plex_lib.update(query_params)
         self.state.update(uri=None)
+        if self.queue is not None:
+            self.queue.cancel_prefetch()
         self.queue = self.plex_lib.get_queue(container_key)
         await self.queue.get_info()
         await self.play_selected_queue_item(offset=offset, paused=paused)
@@ -606,19 +606,10 @@ class PlexDlnaAdapter:
     async def get_volume(self):
         volume = await self.dlna.GetVolume()
         volume = int(volume.CurrentVolume)
-        return convert_volume(
-            volume, self.dlna.volume_max, self.dlna.volume_min, 100, 0, 1
-        )
+        return self.dlna.volume_to_plex(volume)
 
     async def set_volume(self, volume):
-        volume = convert_volume(
-            volume,
-            100,
-            0,
-            self.dlna.volume_max,
-            self.dlna.volume_min,
-            self.dlna.volume_step,
-        )
+        volume = self.dlna.volume_from_plex(volume)
         await self.dlna.SetVolume(volume)
         self.state.check_all_next_loop = True
 
@@ -652,15 +643,10 @@ class PlexDlnaAdapter:
             headers=pms_header(self.dlna),
         )
 
-    def update_state(self, info):
-        if info.propertyset:
-            info = info.propertyset.property.LastChange.Event.InstanceID
-        else:
-            return
-
-        state = info.TransportState["@val"]
-        uri = info.AVTransportURI["@val"]
-        pos = info.RelativeTimePosition["@val"]
+    def update_state(self, info: dict[str, str]):
+        state = info.get("TransportState")
+        uri = info.get("AVTransportURI")
+        pos = info.get("RelativeTimePosition")
         if not state and not uri and not pos:
             logger.info("ignoring notice no info")
             return
@@ -687,11 +673,11 @@ class PlexDlnaAdapter:
         if self.state.state == "TRANSITIONING":
             return "playing"
 
-    async def get_pms_state(self):
+    async def get_pms_state(self, state: StateInfo | None = None):
         if self.state is None:
             return None
 
-        d = await self.get_state()
+        d = await self.get_state() if state is None else StateInfo(state)
         keys = [
             "state",
             "ratingKey",
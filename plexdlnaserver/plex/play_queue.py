@@ -1,11 +1,12 @@
 from __future__ import annotations
+import asyncio
 import logging
 
 import math
 from dataclasses import dataclass, field
 from typing import TYPE_CHECKING, TypedDict
 
-from dotmap import DotMap
+import orjson
 from starlette.datastructures import URL, QueryParams
 
 from ..utils import g
@@ -32,9 +33,10 @@ class TrackInfo(TypedDict):
 class PlayQueue:
     container_key: str
     plex_lib: PlexLib
-    info: DotMap | None = field(default=None, init=False)
+    info: dict | None = field(default=None, init=False)
     start_offset: int | None = field(default=None, init=False)
     repeat: int = field(default=0, init=False)
+    _prefetching: asyncio.Task | None = field(default=None, init=False)
 
     @classmethod
     def from_url(cls, url):
@@ -59,62 +61,61 @@ class PlayQueue:
         logger.info("get queue %s", url)
         async with g.http.get(url, headers={"Accept": "application/json"}) as res:
             res.raise_for_status()
-            self.info = DotMap((await res.json())["MediaContainer"])
-            for idx, track in enumerate(await self.available_tracks()):
-                if track.playQueueItemID == await self.selected_item_id():
-                    self.start_offset = await self.selected_offset() - idx
+            self.info = (await res.json(loads=orjson.loads))["MediaContainer"]
+            selected_item_id = self._selected_item_id()
+            for idx, track in enumerate(self._available_tracks()):
+                if track["playQueueItemID"] == selected_item_id:
+                    self.start_offset = self._selected_offset() - idx
                     break
         return self.info
 
     async def refresh_queue(self, playQueueID):
-        if playQueueID != self.info.playQueueID:
+        self.cancel_prefetch()
+        if playQueueID != self.info["playQueueID"]:
             logger.info(
                 "refresh to a different queue? %s -> %s",
-                self.info.playQueueID,
+                self.info["playQueueID"],
                 playQueueID,
             )
             self.container_key = str(self.container_key).replace(
-                str(self.info.playQueueID), str(playQueueID), 1
+                str(self.info["playQueueID"]), str(playQueueID), 1
             )
 
-        old_selected_item_id = await self.selected_item_id()
-        old_selected_item_offset = await self.selected_offset()
+        old_selected_item_id = self._selected_item_id()
+        old_selected_item_offset = self._selected_offset()
         url = self.plex_lib.build_url(self.container_key)
 
         logger.info("refresh queue %s", url)
         async with g.http.get(url, headers={"Accept": "application/json"}) as res:
             res.raise_for_status()
-            info = DotMap((await res.json())["MediaContainer"])
-            found = 0
-            new_available_offset = None
-            start_offset = None
-            for idx, track in enumerate(info.Metadata):
-                if track.playQueueItemID == old_selected_item_id:
-                    new_available_offset = idx
-                    found += 1
-                if track.playQueueItemID == info.playQueueSelectedItemID:
-                    start_offset = info.playQueueSelectedItemOffset - idx
-                    found += 1
-                if found >= 2:
-                    break
-            if new_available_offset is None or start_offset is None:
+            info = (await res.json(loads=orjson.loads))["MediaContainer"]
+            id_to_idx = {
+                track["playQueueItemID"]: idx
+                for idx, track in enumerate(info["Metadata"])
+            }
+            new_available_offset = id_to_idx.get(old_selected_item_id)
+            selected_idx = id_to_idx.get(info["playQueueSelectedItemID"])
+            if new_available_offset is None or selected_idx is None:
                 raise Exception("refreshed queue has no current selected item?")
+            start_offset = info["playQueueSelectedItemOffset"] - selected_idx
             selected_offset = new_available_offset + start_offset
             print(
                 f"refreshed queue info SelectedItemOffset {old_selected_item_offset} -> {selected_offset}, "
                 f"start_offset {self.start_offset} -> {start_offset}"
             )
-            info.playQueueSelectedItemID = old_selected_item_id
-            info.playQueueSelectedItemOffset = selected_offset
+            info["playQueueSelectedItemID"] = old_selected_item_id
+            info["playQueueSelectedItemOffset"] = selected_offset
             self.info = info
             self.start_offset = start_offset
 
     async def set_selected_offset(self, offset):
-        assert 0 <= offset < await self.total_count()
+        await self.wait_prefetch()
         info = await self.get_info()
+        total = self._total_count()
+        assert 0 <= offset < total
         if (
             offset > self.last_offset - MIN_QUEUE_GAP
-            and self.last_offset + 1 < await self.total_count()
+            and self.last_offset + 1 < total
         ):
             await self.more(after=True)
             await self.set_selected_offset(offset)
@@ -122,13 +123,55 @@ class PlayQueue:
             await self.more(after=False)
             await self.set_selected_offset(offset)
         else:
-            info.playQueueSelectedItemOffset = offset
-            info.playQueueSelectedItemID = (await self.selected_track()).playQueueItemID
+            previous_offset = info["playQueueSelectedItemOffset"]
+            info["playQueueSelectedItemOffset"] = offset
+            info["playQueueSelectedItemID"] = self._track_sync(offset)[
+                "playQueueItemID"
+            ]
+            self.prefetch(offset, previous_offset)
+
+    def prefetch(self, offset, previous_offset):
+        if self._prefetching is not None and not self._prefetching.done():
+            return
+        if (
+            offset > previous_offset
+            and self.last_offset - offset < 2 * MIN_QUEUE_GAP
+            and self.last_offset + 1 < self._total_count()
+        ):
+            after = True
+        elif (
+            offset < previous_offset
+            and offset - self.start_offset < 2 * MIN_QUEUE_GAP
+            and self.start_offset > 1
+        ):
+            after = False
+        else:
+            return
+        self._prefetching = asyncio.create_task(self.more(after=after))
+        self._prefetching.add_done_callback(self._prefetch_done)
+
+    def _prefetch_done(self, task: asyncio.Task):
+        if self._prefetching is task:
+            self._prefetching = None
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(
+                "queue %s prefetch error %s", self.container_key, task.exception()
+            )
+
+    async def wait_prefetch(self):
+        task = self._prefetching
+        if task is not None and task is not asyncio.current_task():
+            await asyncio.wait([task])
+
+    def cancel_prefetch(self):
+        if self._prefetching is not None:
+            self._prefetching.cancel()
+            self._prefetching = None
 
     async def track(self, offset):
         if self.info is None:
             await self.get_info()
-        assert 0 <= offset < await self.total_count()
+        assert 0 <= offset < self._total_count()
         if offset > self.last_offset:
             await self.more(after=True)
             return await self.track(offset)
@@ -136,102 +179,122 @@ class PlayQueue:
             await self.more(after=False)
             return await self.track(offset)
         else:
-            offset = offset - self.start_offset
-            return (await self.available_tracks())[offset]
+            return self._track_sync(offset)
 
     async def selected_track(self):
-        return await self.track(await self.selected_offset())
+        if self.info is None:
+            await self.get_info()
+        return await self.track(self._selected_offset())
 
     async def prev_track(self):
         return await self.next_track(reverse=True)
 
     async def next_track(self, reverse=False):
         direction = -1 if reverse else 1
-        return await self.track(await self.selected_offset() + direction)
+        if self.info is None:
+            await self.get_info()
+        return await self.track(self._selected_offset() + direction)
 
     async def select_track_key(self, key):
         for idx, track in enumerate(await self.available_tracks()):
-            if track.key == key:
+            if track["key"] == key:
                 await self.set_selected_offset(idx + self.start_offset)
                 break
 
     def url_for_track(self, track):
-        return self.plex_lib.build_url(track.Media[0].Part[0].key)
+        return self.plex_lib.build_url(track["Media"][0]["Part"][0]["key"])
 
     async def allow_shuffle(self):
         info = await self.get_info()
         if info.get("allowShuffle", None) is None:
-            if (await self.total_count()) == UNLIMITED:
+            if self._total_count() == UNLIMITED:
                 return False
             return True
-        return info.allowShuffle
+        return info["allowShuffle"]
 
     @property
     def last_offset(self):
         if self.start_offset is None:
             return None
-        return self.start_offset + len(self.info.Metadata) - 1
+        return self.start_offset + len(self.info["Metadata"]) - 1
 
     async def more(self, after=True):
+        await self.wait_prefetch()
         if self.info is None:
             await self.get_info()
         url = URL(self.plex_lib.build_url(self.container_key))
         url = url.remove_query_params(["center", "includeBefore", "includeAfter"])
         args = {"includeAfter": 0, "includeBefore": 0}
         if after:
-            if self.last_offset >= (await self.total_count()) - 1:
+            if self.last_offset >= self._total_count() - 1:
                 return
             args["includeAfter"] = 1
-            t = await self.track(self.start_offset + (await self.available_count()) - 1)
-            args["center"] = t.playQueueItemID
+            t = await self.track(self.start_offset + len(self._available_tracks()) - 1)
+            args["center"] = t["playQueueItemID"]
         else:
             if self.start_offset <= 1:
                 return
             args["includeBefore"] = 1
             t = await self.track(self.start_offset)
-            args["center"] = t.playQueueItemID
+            args["center"] = t["playQueueItemID"]
         url = url.include_query_params(**args)
         async with g.http.get(str(url), headers={"Accept": "application/json"}) as res:
             res.raise_for_status()
-            info = DotMap((await res.json())["MediaContainer"])
+            info = (await res.json(loads=orjson.loads))["MediaContainer"]
+            count = len(info["Metadata"])
             if after:
-                self.info.Metadata += info.Metadata
-                print(f"queue {self.container_key} append {len(info.Metadata)} items")
+                self.info["Metadata"] += info["Metadata"]
+                print(f"queue {self.container_key} append {count} items")
             else:
-                self.info.Metadata = info.Metadata + self.info.Metadata
-                print(f"queue {self.container_key} prepend {len(info.Metadata)} items")
-                self.start_offset -= len(info.Metadata)
+                self.info["Metadata"] = info["Metadata"] + self.info["Metadata"]
+                print(f"queue {self.container_key} prepend {count} items")
+                self.start_offset -= count
 
     async def available_tracks(self):
-        info = await self.get_info()
-        return info.Metadata
+        await self.get_info()
+        return self._available_tracks()
 
     async def available_count(self):
         return len(await self.available_tracks())
 
     async def total_count(self):
-        info = await self.get_info()
-        if not info.playQueueTotalCount:
-            return UNLIMITED
-        return info.playQueueTotalCount
+        await self.get_info()
+        return self._total_count()
 
     async def selected_item_id(self):
-        info = await self.get_info()
-        return info.playQueueSelectedItemID
+        await self.get_info()
+        return self._selected_item_id()
 
     async def selected_offset(self):
-        info = await self.get_info()
-        return info.playQueueSelectedItemOffset
+        await self.get_info()
+        return self._selected_offset()
+
+    # Synchronous accessors, only valid once ``self.info`` has been loaded.
+
+    def _available_tracks(self):
+        return self.info["Metadata"]
+
+    def _total_count(self):
+        return self.info.get("playQueueTotalCount") or UNLIMITED
+
+    def _selected_item_id(self):
+        return self.info["playQueueSelectedItemID"]
+
+    def _selected_offset(self):
+        return self.info["playQueueSelectedItemOffset"]
+
+    def _track_sync(self, offset):
+        return self.info["Metadata"][offset - self.start_offset]
 
     async def get_track_info(self):
         track = await self.selected_track()
 
         return TrackInfo(
-            duration=track.duration,
-            key=track.key,
-            ratingKey=track.ratingKey,
-            containerKey=f"/playQueues/{self.info.playQueueID}",
-            playQueueID=self.info.playQueueID,
-            playQueueVersion=self.info.playQueueVersion,
-            playQueueItemID=track.playQueueItemID,
+            duration=track["duration"],
+            key=track["key"],
+            ratingKey=track["ratingKey"],
+            containerKey=f"/playQueues/{self.info['playQueueID']}",
+            playQueueID=self.info["playQueueID"],
+            playQueueVersion=self.info["playQueueVersion"],
+            playQueueItemID=track["playQueueItemID"],
         ) 
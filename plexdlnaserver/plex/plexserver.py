@@ -10,14 +10,25 @@ from fastapi import FastAPI, Form, Header, HTTPException, Query, Request
 from fastapi.responses import Response
 from fastapi.templating import Jinja2Templates
 
-from ..dlna import DlnaDiscover, devices, get_device_by_uuid, get_device_data
+from ..dlna import (
+    DlnaDiscover,
+    add_device,
+    devices,
+    get_device_by_uuid,
+    get_device_data,
+)
 from ..dlna.dlna_device import DlnaDevice
 from ..settings import settings
-from ..utils import g, plex_server_response_headers, timeline_poll_headers, xml2dict
+from ..utils import (
+    g,
+    parse_upnp_event,
+    plex_server_response_headers,
+    timeline_poll_headers,
+)
 from . import pin_login
 from .adapters import adapter_by_device
 from .gdm import PlexGDM
-from .subscribe import sub_man
+from .subscribe import render_timeline, sub_man
 
 logger = logging.getLogger(__name__)
 
@@ -51,7 +62,7 @@ async def on_new_dlna_device(location_url):
     logger.info("got new DLNA device %s", device.name)
 
     asyncio.create_task(device.loop_subscribe(), name=f"dlna sub {device.name}")
-    devices.append(device)
+    add_device(device)
     adapter = adapter_by_device(device)
     adapter.start_plex_tv_notify()
     gdm = PlexGDM(device)
@@ -180,17 +191,17 @@ async def dlna_subscribe(request: Request, uuid: str):
     logger.info("NOTIFY /dlna/callback/%s", uuid)
     adapter = adapter_by_device(await get_device_by_uuid(uuid))
     b = await request.body()
-    info = xml2dict(b)
+    info = parse_upnp_event(b)
 
-    if info.get("RelativeTimePosition"):
+    if info and info.get("RelativeTimePosition"):
         logger.info(
             "got playback info %s %s %s",
             info["RelativeTimePosition"],
-            info["Duration"],
-            info["TransportState"],
+            info.get("CurrentTrackDuration"),
+            info.get("TransportState"),
         )
 
-    if adapter is not None:
+    if adapter is not None and info is not None:
         adapter.update_state(info)
     return ""
 
@@ -428,7 +439,7 @@ async def timeline_poll(
         await asyncio.sleep(settings.plex_notify_interval)
         msg = await sub_man.msg_for_device(device)
 
-    msg = msg.format(command_id=commandID)
+    msg = render_timeline(msg, commandID)
     if datetime.utcnow() - begin_time >= timedelta(milliseconds=500):
         logger.info("long poll %s", target_uuid)
         logger.info("%s used %s", request.url, datetime.utcnow() - begin_time)
@@ -2,12 +2,15 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import time
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from typing import TYPE_CHECKING
 
+import aiohttp
+
 from ..dlna import devices, get_device_by_uuid
-from .adapters import adapter_by_device
+from .adapters import StateInfo, adapter_by_device
 from ..settings import settings
 from ..utils import g, pms_header, subscriber_send_headers
 
@@ -16,6 +19,10 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+SEND_TIMEOUT = aiohttp.ClientTimeout(total=1, sock_connect=0.5)
+SERVER_NOTIFY_STALE_INTERVALS = 10
+MAX_CONCURRENT_NOTIFY = 8
+
 TIMELINE_STOPPED = (
     '<MediaContainer commandID="{command_id}">'
     '<Timeline type="music" state="stopped"/>'
@@ -44,18 +51,26 @@ TIMELINE_PLAYING = (
     'state="stopped"/></MediaContainer> '
 )
 
+TIMELINE_STOPPED_PARTS = tuple(TIMELINE_STOPPED.split("{command_id}"))
+TIMELINE_DISCONNECTED_PARTS = tuple(TIMELINE_DISCONNECTED.split("{command_id}"))
+TIMELINE_PLAYING_LEFT, TIMELINE_PLAYING_RIGHT = TIMELINE_PLAYING.split("{command_id}")
+
+
+def render_timeline(parts: tuple[str, str], command_id: int) -> str:
+    left, right = parts
+    return f"{left}{command_id}{right}"
+
 
 class SubscribeManager:
-    subscribers: dict[str, list[Subscriber]] = {}
+    subscribers: dict[str, dict[str, Subscriber]] = {}
     running = True
     last_server_notify_state: dict[str, str] = {}
+    last_server_notify_hash: dict[str, int] = {}
+    last_server_notify_time: dict[str, float] = {}
+    notify_semaphore: asyncio.Semaphore | None = None
 
     def get_subscriber(self, target_uuid: str, client_uuid: str):
-        subscribers = [
-            s for s in self.subscribers.get(target_uuid, []) if s.uuid == client_uuid
-        ]
-
-        return subscribers[0] if subscribers else None
+        return self.subscribers.get(target_uuid, {}).get(client_uuid)
 
     def update_command_id(self, target_uuid: str, client_uuid: str, command_id: int):
         subscriber = self.get_subscriber(target_uuid, client_uuid)
@@ -82,46 +97,62 @@ class SubscribeManager:
         )
 
         subscriber = self.get_subscriber(target_uuid, client_uuid)
-        if subscriber:
-            if subscriber.host != host or s.port != port or s.protocol != protocol:
-                await self.remove_subscriber(subscriber.uuid)
-            else:
-                subscriber.command_id = command_id
-                return
+        if (
+            subscriber
+            and subscriber.host == host
+            and subscriber.port == port
+            and subscriber.protocol == protocol
+        ):
+            subscriber.command_id = command_id
+            return
 
-        subscribers = self.subscribers.get(target_uuid, [])
-        subscribers.append(
-            Subscriber(client_uuid, host, port, self, protocol, command_id)
+        self.subscribers.setdefault(target_uuid, {})[client_uuid] = Subscriber(
+            client_uuid, host, port, self, protocol, command_id
         )
-        self.subscribers[target_uuid] = subscribers
 
     async def remove_subscriber(self, uuid, target_uuid: str | None = None):
         logger.info("remove_subscriber %s %s", uuid, target_uuid)
 
         for uuid_ in (
-            [target_uuid] if target_uuid is not None else self.subscribers.keys()
+            [target_uuid] if target_uuid is not None else list(self.subscribers)
         ):
-            subscribers = self.subscribers.get(uuid_, [])
-            remove = None
-            for subscribe in subscribers:
-                if subscribe.uuid == uuid:
-                    remove = subscribe
-                    break
-            if remove in subscribers:
-                subscribers.remove(remove)
-            if not subscribers:
+            subscribers = self.subscribers.get(uuid_)
+            if (
+                subscribers
+                and subscribers.pop(uuid, None) is not None
+                and not subscribers
+            ):
                 device = await get_device_by_uuid(uuid_)
-                if device is not None and not self.subscribers.get(uuid_):
+                if device is not None:
                     device.stop_subscribe()
 
     def stop(self):
         self.running = False
 
-    async def notify_server(self):
-        await asyncio.gather(*[self.notify_server_device(device) for device in devices])
+    async def bounded(self, coro):
+        async with self.notify_semaphore:
+            return await coro
 
-    async def notify_server_device(self, device, force=False):
-        subs = self.subscribers.get(device.uuid, [])
+    async def device_state(self, device, states: dict[str, StateInfo] | None):
+        adapter = adapter_by_device(device)
+        if states is None:
+            return await adapter.get_state()
+        if device.uuid not in states:
+            states[device.uuid] = await adapter.get_state()
+        return StateInfo(states[device.uuid])
+
+    async def notify_server(self, states: dict[str, StateInfo] | None = None):
+        await asyncio.gather(
+            *[
+                self.bounded(self.notify_server_device(device, states=states))
+                for device in devices
+            ]
+        )
+
+    async def notify_server_device(
+        self, device, force=False, states: dict[str, StateInfo] | None = None
+    ):
+        subs = self.subscribers.get(device.uuid)
         if not subs and not force:
             return
 
@@ -141,22 +172,37 @@ class SubscribeManager:
         ):
             return
         self.last_server_notify_state[device.uuid] = adapter.plex_state
-        params = await adapter.get_pms_state()
+        params = await adapter.get_pms_state(await self.device_state(device, states))
         if not params or params.get("state", None) is None:
             return
+        params_hash = hash(frozenset(params.items()))
+        now = time.monotonic()
+        if (
+            not force
+            and self.last_server_notify_hash.get(device.uuid) == params_hash
+            and now - self.last_server_notify_time.get(device.uuid, 0)
+            < settings.plex_notify_interval * SERVER_NOTIFY_STALE_INTERVALS
+        ):
+            return
         params.update(pms_header(device))
         async with g.http.get(adapter.plex_lib.get_timeline(), params=params) as res:
             try:
                 res.raise_for_status()
             except Exception as e:
                 logger.warning("notify server error %s %s %s", e, res.content, params)
+            else:
+                self.last_server_notify_hash[device.uuid] = params_hash
+                self.last_server_notify_time[device.uuid] = now
 
     async def notify(self):
-        await self.notify_server()
-        tasks = [self.notify_device(device) for device in devices]
+        states: dict[str, StateInfo] = {}
+        await self.notify_server(states)
+        tasks = [self.bounded(self.notify_device(device, states)) for device in devices]
         await asyncio.gather(*tasks)
 
-    async def msg_for_device(self, device):
+    async def msg_for_device(
+        self, device, states: dict[str, StateInfo] | None = None
+    ):
         adapter = adapter_by_device(device)
         if adapter.no_notice:
             return None
@@ -166,36 +212,42 @@ class SubscribeManager:
             or adapter.state.state == "STOPPED"
             or adapter.queue is None
         ):
-            return TIMELINE_STOPPED
+            return TIMELINE_STOPPED_PARTS
 
-        state = await adapter.get_state()
+        state = await self.device_state(device, states)
         if not state or state.get("state", None) is None:
-            return TIMELINE_STOPPED
+            return TIMELINE_STOPPED_PARTS
 
         state["itemType"] = "music"
         logger.debug("notify %s %s", device.uuid, state)
-        xml = TIMELINE_PLAYING.format(
+        right = TIMELINE_PLAYING_RIGHT.format(
             parameters=" ".join([f'{k}="{v}"' for k, v in state.items()]),
-            command_id="{command_id}",
         )
-        return xml
+        return TIMELINE_PLAYING_LEFT, right
 
-    async def notify_device(self, device: DlnaDevice):
-        subs = self.subscribers.get(device.uuid, [])
+    async def notify_device(
+        self, device: DlnaDevice, states: dict[str, StateInfo] | None = None
+    ):
+        subs = self.subscribers.get(device.uuid, {}).values()
         adapter = adapter_by_device(device)
         if adapter.no_notice:
             logger.info("ignore sub notice for %s", adapter.dlna.name)
             return
 
-        msg = await self.msg_for_device(device)
+        msg = await self.msg_for_device(device, states)
         if msg is None:
             return
 
-        await asyncio.gather(*[sub.send(msg, device) for sub in subs])
+        # Subscribers sharing a timeline url and command id would receive the
+        # exact same request, so post it once per controller endpoint.
+        unique_subs = {(sub.url, sub.command_id): sub for sub in subs}
+        await asyncio.gather(*[sub.send(msg, device) for sub in unique_subs.values()])
 
     async def notify_device_disconnected(self, device):
-        subs = self.subscribers.get(device.uuid, [])
-        await asyncio.gather(*[sub.send(TIMELINE_DISCONNECTED, device) for sub in subs])
+        subs = list(self.subscribers.get(device.uuid, {}).values())
+        await asyncio.gather(
+            *[sub.send(TIMELINE_DISCONNECTED_PARTS, device) for sub in subs]
+        )
         asyncio.create_task(
             asyncio.gather(
                 *[
@@ -206,6 +258,7 @@ class SubscribeManager:
         )
 
     async def start(self):
+        self.notify_semaphore = asyncio.Semaphore(MAX_CONCURRENT_NOTIFY)
         await self.notify()
         while self.running:
             await asyncio.sleep(settings.plex_notify_interval)
@@ -257,13 +310,16 @@ class Subscriber:
     def __post_init__(self):
         self.url = f"{self.protocol}://{self.host}:{self.port}/:/timeline"
 
-    async def send(self, msg: str, device: DlnaDevice):
-        msg = msg.format(command_id=self.command_id)
+    async def send(self, parts: tuple[str, str], device: DlnaDevice):
+        msg = render_timeline(parts, self.command_id)
         response = None
         # print(f"sub send {self.host} {msg}")
         try:
             async with g.http.post(
-                self.url, data=msg, headers=subscriber_send_headers(device), timeout=1
+                self.url,
+                data=msg,
+                headers=subscriber_send_headers(device),
+                timeout=SEND_TIMEOUT,
             ) as response:
                 response.raise_for_status()
         except Exception as e:
@@ -1,11 +1,11 @@
 from __future__ import annotations
 
-import json
 import socket
 from dataclasses import dataclass, field
 from functools import cached_property
 from pathlib import Path
 
+import orjson
 from pydantic import BaseSettings
 
 
@@ -21,7 +21,8 @@ class Settings:
     plex_notify_interval = 0.5
     config_path = "config"
     data_file_name = "data.json"
-
+    _data: dict | None = field(default=None, init=False, repr=False)
+    _data_mtime: int | None = field(default=None, init=False, repr=False)
 
     @cached_property
     def host_ip(self):
@@ -54,23 +55,30 @@ class Settings:
 
     def load_data(self):
         p = Path(self.config_path).joinpath(self.data_file_name)
-        p.parent.mkdir(parents=True, exist_ok=True)
-        if not p.exists():
+        try:
+            mtime = p.stat().st_mtime_ns
+        except FileNotFoundError:
+            p.parent.mkdir(parents=True, exist_ok=True)
             return {}
+        if self._data is not None and mtime == self._data_mtime:
+            return self._data
         try:
-            with open(p) as f:
-                j = json.load(f)
-                return j
+            with open(p, mode="rb") as f:
+                self._data = orjson.loads(f.read())
         except Exception:
             return {}
+        self._data_mtime = mtime
+        return self._data
 
     def save_data(self, data):
         p = Path(self.config_path).joinpath(self.data_file_name)
         p.parent.mkdir(parents=True, exist_ok=True)
         if not p.exists():
             p.touch()
-        with open(p, mode="w") as f:
-            json.dump(data, f, indent=4)
+        with open(p, mode="wb") as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        self._data = data
+        self._data_mtime = p.stat().st_mtime_ns
 
     def get_token_for_uuid(self, uuid):
         d = self.load_data()
@@ -1,9 +1,13 @@
 from __future__ import annotations
 
 import logging
+import re
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from typing import TYPE_CHECKING, overload
+from functools import lru_cache
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Callable, Literal, Mapping, overload
+from xml.etree import ElementTree
 
 import aiohttp
 import xmltodict
@@ -13,6 +17,8 @@ from .settings import settings
 
 if TYPE_CHECKING:
     from .dlna.dlna_device import DlnaDevice
+    from .dlna.models.root import Root
+    from .dlna.models.service import SCPDRoot
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +30,10 @@ UPNP_RC_SERVICE_TYPE_PREFIX = "urn:schemas-upnp-org:service:RenderingControl"
 UPNP_AVT_SERVICE_TYPE = UPNP_RC_SERVICE_TYPE_PREFIX + ":{version}"
 UPNP_RC_SERVICE_TYPE = UPNP_RC_SERVICE_TYPE_PREFIX + ":{version}"
 
+HTTP_CONNECTION_LIMIT = 100
+HTTP_CONNECTION_LIMIT_PER_HOST = 20
+HTTP_KEEPALIVE_TIMEOUT = 75
+
 
 class ClientSession(aiohttp.ClientSession):
     verify_ssl: bool
@@ -46,14 +56,42 @@ class G:
     def create_session(self):
         self.http = ClientSession(
             verify_ssl=self.verify_ssl,
+            connector=aiohttp.TCPConnector(
+                limit=HTTP_CONNECTION_LIMIT,
+                limit_per_host=HTTP_CONNECTION_LIMIT_PER_HOST,
+                keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+                enable_cleanup_closed=True,
+            ),
         )
 
 
 g = G()
 
 
+XML_ENTITY_RE = re.compile(rb"&(lt|gt|quot);")
+XML_ENTITIES = {b"lt": b"<", b"gt": b">", b"quot": b'"'}
+
+
 def unescape_xml(xml: bytes) -> str:
-    return xml.decode().replace("&lt;", "<").replace("&gt;", ">").replace("&quot;", '"')
+    return XML_ENTITY_RE.sub(lambda m: XML_ENTITIES[m[1]], xml).decode()
+
+
+XML_STATIC_NAMESPACES = MappingProxyType(
+    {
+        "http://schemas.xmlsoap.org/soap/envelope/": None,
+        "urn:schemas-upnp-org:event-1-0": None,
+        "urn:schemas-upnp-org:metadata-1-0/AVT/": None,
+    }
+)
+
+
+@lru_cache(maxsize=8)
+def _xml_namespaces(upnp_avt_service_type: str, upnp_rc_service_type: str):
+    return {
+        upnp_avt_service_type: None,
+        upnp_rc_service_type: None,
+        **XML_STATIC_NAMESPACES,
+    }
 
 
 @overload
@@ -61,7 +99,8 @@ def xml2dict(
     xml: str | bytes,
     upnp_avt_service_type: str = ...,
     upnp_rc_service_type: str = ...,
-    as_dotmap: bool = True,
+    *,
+    as_dotmap: Literal[True],
 ) -> DotMap:
     ...
 
@@ -71,7 +110,8 @@ def xml2dict(
     xml: str | bytes,
     upnp_avt_service_type: str = ...,
     upnp_rc_service_type: str = ...,
-    as_dotmap: bool = False,
+    *,
+    as_dotmap: Literal[False] = False,
 ) -> dict:
     ...
 
@@ -80,7 +120,8 @@ def xml2dict(
     xml: str | bytes,
     upnp_avt_service_type: str = UPNP_AVT_SERVICE_TYPE.format(version=1),
     upnp_rc_service_type: str = UPNP_RC_SERVICE_TYPE.format(version=1),
-    as_dotmap: bool = True,
+    *,
+    as_dotmap: bool = False,
 ) -> DotMap | dict:
     if not isinstance(xml, str):
         xml = unescape_xml(xml)
@@ -88,13 +129,7 @@ def xml2dict(
     parsed = xmltodict.parse(
         xml,
         process_namespaces=True,
-        namespaces={
-            upnp_avt_service_type: None,
-            upnp_rc_service_type: None,
-            "http://schemas.xmlsoap.org/soap/envelope/": None,
-            "urn:schemas-upnp-org:event-1-0": None,
-            "urn:schemas-upnp-org:metadata-1-0/AVT/": None,
-        },
+        namespaces=_xml_namespaces(upnp_avt_service_type, upnp_rc_service_type),
     )
     if as_dotmap:
         return DotMap(parsed)
@@ -102,62 +137,195 @@ def xml2dict(
         return parsed
 
 
-def pms_header(device):
+def _strip_namespaces(root: ElementTree.Element) -> ElementTree.Element:
+    for elem in root.iter():
+        if elem.tag[0] == "{":
+            elem.tag = elem.tag.rsplit("}", 1)[1]
+    return root
+
+
+def _leaf_values(elem: ElementTree.Element | None) -> dict:
+    if elem is None:
+        return {}
     return {
-        "X-Plex-Client-Identifier": device.uuid,
-        "X-Plex-Device": device.model,
-        "X-Plex-Device-Name": device.name,
-        "X-Plex-Platform": settings.platform,
-        "X-Plex-Platform-Version": settings.platform_version,
-        "X-Plex-Product": device.model,
-        "X-Plex-Version": settings.version,
-        "X-Plex-Provides": "player,pubsub-player",
+        child.tag: (child.text or "").strip() or None
+        for child in elem
+        if len(child) == 0
     }
 
 
-def plex_server_response_headers(device):
+def parse_scpd(xml: str | bytes) -> SCPDRoot:
+    root = _strip_namespaces(ElementTree.fromstring(xml))
+
+    actions = []
+    for elem in root.iterfind("actionList/action"):
+        action = _leaf_values(elem)
+        action["argumentList"] = {
+            "argument": [
+                _leaf_values(argument)
+                for argument in elem.iterfind("argumentList/argument")
+            ]
+        }
+        actions.append(action)
+
+    state_variables = []
+    for elem in root.iterfind("serviceStateTable/stateVariable"):
+        state_variable = _leaf_values(elem)
+        state_variable.update(elem.attrib)
+        if (value_range := elem.find("allowedValueRange")) is not None:
+            state_variable["allowedValueRange"] = _leaf_values(value_range)
+        if (value_list := elem.find("allowedValueList")) is not None:
+            state_variable["allowedValueList"] = {
+                "allowedValue": [value.text for value in value_list]
+            }
+        state_variables.append(state_variable)
+
     return {
-        "Accept": "*/*",
-        "Connection": "keep-alive",
-        "Accept-Language": "en",
-        "X-Plex-Device": device.model,
-        "X-Plex-Platform": settings.platform,
-        "X-Plex-Platform-Version": settings.platform_version,
-        "X-Plex-Product": device.model,
-        "X-Plex-Version": settings.version,
-        "X-Plex-Client-Identifier": device.uuid,
-        "X-Plex-Device-Name": device.name,
-        "X-Plex-Provides": "player,pubsub-player",
+        "scpd": {
+            "specVersion": _leaf_values(root.find("specVersion")),
+            "actionList": {"action": actions},
+            "serviceStateTable": {"stateVariable": state_variables},
+        }
     }
 
 
+def parse_root(xml: str | bytes) -> Root:
+    root = _strip_namespaces(ElementTree.fromstring(xml))
+
+    elem = root.find("device")
+    device = _leaf_values(elem)
+    if elem is not None:
+        device["serviceList"] = {
+            "service": [
+                _leaf_values(service)
+                for service in elem.iterfind("serviceList/service")
+            ]
+        }
+        device["iconList"] = {
+            "icon": [_leaf_values(icon) for icon in elem.iterfind("iconList/icon")]
+        }
+
+    return {"specVersion": _leaf_values(root.find("specVersion")), "device": device}
+
+
+def parse_upnp_event(xml: str | bytes) -> dict[str, str] | None:
+    root = _strip_namespaces(ElementTree.fromstring(xml))
+    last_change = root.find(".//LastChange")
+    if last_change is None:
+        return None
+    if len(last_change):
+        event = _strip_namespaces(last_change[0])
+    elif last_change.text and last_change.text.strip():
+        event = _strip_namespaces(ElementTree.fromstring(last_change.text.strip()))
+    else:
+        return None
+    instance = event.find("InstanceID")
+    if instance is None:
+        return None
+    return {child.tag: child.get("val") for child in instance}
+
+
+def pms_header(device):
+    return _pms_header(device.uuid, device.model, device.name)
+
+
+@lru_cache(maxsize=512)
+def _pms_header(uuid: str, model: str, name: str) -> Mapping[str, str]:
+    return MappingProxyType(
+        {
+            "X-Plex-Client-Identifier": uuid,
+            "X-Plex-Device": model,
+            "X-Plex-Device-Name": name,
+            "X-Plex-Platform": settings.platform,
+            "X-Plex-Platform-Version": settings.platform_version,
+            "X-Plex-Product": model,
+            "X-Plex-Version": settings.version,
+            "X-Plex-Provides": "player,pubsub-player",
+        }
+    )
+
+
+def plex_server_response_headers(device):
+    return _plex_server_response_headers(device.uuid, device.model, device.name)
+
+
+@lru_cache(maxsize=512)
+def _plex_server_response_headers(
+    uuid: str, model: str, name: str
+) -> Mapping[str, str]:
+    return MappingProxyType(
+        {
+            "Accept": "*/*",
+            "Connection": "keep-alive",
+            "Accept-Language": "en",
+            "X-Plex-Device": model,
+            "X-Plex-Platform": settings.platform,
+            "X-Plex-Platform-Version": settings.platform_version,
+            "X-Plex-Product": model,
+            "X-Plex-Version": settings.version,
+            "X-Plex-Client-Identifier": uuid,
+            "X-Plex-Device-Name": name,
+            "X-Plex-Provides": "player,pubsub-player",
+        }
+    )
+
+
 def subscriber_send_headers(device: DlnaDevice):
-    return {
-        "Content-Type": "application/xml",
-        "Connection": "Keep-Alive",
-        "X-Plex-Client-Identifier": device.uuid,
-        "X-Plex-Platform": settings.platform,
-        "X-Plex-Platform-Version": settings.platform_version,
-        "X-Plex-Product": device.model,
-        "X-Plex-Version": settings.version,
-        "X-Plex-Device-Name": device.name,
-        "Accept-Encoding": "gzip, deflate",
-        "Accept-Language": "en,*",
-    }
+    return _subscriber_send_headers(device.uuid, device.model, device.name)
+
+
+@lru_cache(maxsize=512)
+def _subscriber_send_headers(uuid: str, model: str, name: str) -> Mapping[str, str]:
+    return MappingProxyType(
+        {
+            "Content-Type": "application/xml",
+            "Connection": "Keep-Alive",
+            "X-Plex-Client-Identifier": uuid,
+            "X-Plex-Platform": settings.platform,
+            "X-Plex-Platform-Version": settings.platform_version,
+            "X-Plex-Product": model,
+            "X-Plex-Version": settings.version,
+            "X-Plex-Device-Name": name,
+            "Accept-Encoding": "gzip, deflate",
+            "Accept-Language": "en,*",
+        }
+    )
 
 
 def timeline_poll_headers(device):
-    return {
-        "X-Plex-Client-Identifier": device.uuid,
-        "X-Plex-Protocol": "1.0",
-        "Access-Control-Allow-Origin": "*",
-        "Access-Control-Max-Age": "1209600",
-        "Access-Control-Expose-Headers": "X-Plex-Client-Identifier",
-        "Content-Type": "text/xml;charset=utf-8",
-    }
+    return _timeline_poll_headers(device.uuid)
+
+
+@lru_cache(maxsize=512)
+def _timeline_poll_headers(uuid: str) -> Mapping[str, str]:
+    return MappingProxyType(
+        {
+            "X-Plex-Client-Identifier": uuid,
+            "X-Plex-Protocol": "1.0",
+            "Access-Control-Allow-Origin": "*",
+            "Access-Control-Max-Age": "1209600",
+            "Access-Control-Expose-Headers": "X-Plex-Client-Identifier",
+            "Content-Type": "text/xml;charset=utf-8",
+        }
+    )
 
 
 def parse_timedelta(s: str):
+    parts = s.split(":", 2)
+    if len(parts) == 3:
+        hours, minutes, rest = parts
+        seconds, _, fraction = rest.partition(".")
+        if all(
+            part.isascii() and part.isdigit()
+            for part in (hours, minutes, seconds, fraction or "0")
+        ):
+            return timedelta(
+                hours=int(hours),
+                minutes=int(minutes),
+                seconds=int(seconds),
+                microseconds=int(fraction.ljust(6, "0")[:6]),
+            )
+
     try:
         t = datetime.strptime(s, "%H:%M:%S.%f")
     except ValueError:
@@ -167,15 +335,18 @@ def parse_timedelta(s: str):
     )
 
 
-def convert_volume(
-    value: int, from_max: int, from_min: int, to_max: int, to_min: int, to_step: int
-):
+def volume_converter(
+    from_max: int, from_min: int, to_max: int, to_min: int, to_step: int
+) -> Callable[[int], int]:
     if from_max == to_max and from_min == to_min:
-        return value
+        return lambda value: value
     if from_max - from_min == to_max - to_min:
-        return value - from_min + to_min
-    percent = float(value - from_min) / float(from_max - from_min)
-    value = percent * (to_max - to_min)
-    value = int(value / to_step)
-    value += to_min
-    return value
+        shift = to_min - from_min
+        return lambda value: value + shift
+    numerator = to_max - to_min
+    denominator = (from_max - from_min) * to_step
+
+    def convert(value: int) -> int:
+        return int((value - from_min) * numerator / denominator) + to_min
+
+    return convert
@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from plexdlnaserver.dlna.discover import parse_ssdp_location
+
+
+def test_parse_ssdp_location():
+    location = "http://192.168.1.25:46047/4e02d1d6-f938-4515-a5db-f5a5ce9bbdf1.xml"
+    data = (
+        "HTTP/1.1 200 OK\r\n"
+        "CACHE-CONTROL: max-age=1800\r\n"
+        f"LOCATION: {location}\r\n"
+        "ST: urn:schemas-upnp-org:device:MediaRenderer:1\r\n"
+        "\r\n"
+    ).encode()
+    assert parse_ssdp_location(data) == location
+    assert parse_ssdp_location(data.replace(b"\r\n", b"\n")) == location
+    assert parse_ssdp_location(b"HTTP/1.1 200 OK\r\nST: ssdp:all\r\n\r\n") is None
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from plexdlnaserver.dlna.dlna_device import DlnaDevice
+from plexdlnaserver.dlna.dlna_device import DlnaDevice, build_payload
 import pytest
 import logging
 import pytest_asyncio
@@ -25,3 +25,31 @@ async def test_dlna_device(session):
     await device.get_data()
     logger.info("info: %s", device.info)
     logger.info("GetPositionInfo: %s", (await device.GetPositionInfo()).toDict())
+
+
+@pytest.mark.asyncio
+async def test_resolve_url():
+    device = DlnaDevice("http://192.168.1.25:46047/desc/device.xml")
+    device._url_base = "http://192.168.1.25:46047"
+    assert (
+        device.resolve_url("/AVTransport/control")
+        == "http://192.168.1.25:46047/AVTransport/control"
+    )
+    assert (
+        device.resolve_url("AVTransport/event")
+        == "http://192.168.1.25:46047/desc/AVTransport/event"
+    )
+    assert device.resolve_url(None) == device.location_url
+    assert device.resolve_url("") == device.location_url
+
+
+def test_build_payload_escapes_values():
+    payload = build_payload(
+        "SetAVTransportURI",
+        "urn:schemas-upnp-org:service:AVTransport:1",
+        (("InstanceID", 0), ("CurrentURI", "http://plex/file.mp3?a=1&b=<2>")),
+    )
+    assert b"<InstanceID>0</InstanceID>" in payload
+    assert (
+        b"<CurrentURI>http://plex/file.mp3?a=1&amp;b=&lt;2&gt;</CurrentURI>" in payload
+    )
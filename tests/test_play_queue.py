@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from plexdlnaserver.plex.play_queue import PlayQueue
+
+
+def make_queue(start_offset: int, selected_offset: int):
+    queue = PlayQueue("/playQueues/1", None)
+    queue.info = {
+        "playQueueID": 1,
+        "playQueueTotalCount": 200,
+        "playQueueSelectedItemOffset": selected_offset,
+        "playQueueSelectedItemID": selected_offset,
+        "Metadata": [
+            {"playQueueItemID": start_offset + idx} for idx in range(60)
+        ],
+    }
+    queue.start_offset = start_offset
+    return queue
+
+
+def stub_more(queue: PlayQueue):
+    calls = []
+    release = asyncio.Event()
+
+    async def more(after=True):
+        calls.append(after)
+        await release.wait()
+
+    queue.more = more
+    return calls, release
+
+
+@pytest.mark.asyncio
+async def test_prefetch_starts_once_and_is_awaited():
+    queue = make_queue(start_offset=0, selected_offset=10)
+    calls, release = stub_more(queue)
+
+    await queue.set_selected_offset(30)
+    task = queue._prefetching
+    queue.prefetch(31, 30)
+    await asyncio.sleep(0)
+    assert queue._prefetching is task
+    assert calls == [True]
+
+    asyncio.get_running_loop().call_soon(release.set)
+    await queue.set_selected_offset(31)
+    assert task.done()
+    assert queue.info["playQueueSelectedItemID"] == 31
+    await queue.wait_prefetch()
+
+
+@pytest.mark.asyncio
+async def test_cancel_prefetch():
+    queue = make_queue(start_offset=0, selected_offset=10)
+    calls, _ = stub_more(queue)
+
+    queue.prefetch(30, 10)
+    task = queue._prefetching
+    await asyncio.sleep(0)
+    queue.cancel_prefetch()
+    await asyncio.wait([task])
+    assert calls == [True]
+    assert task.cancelled()
+    assert queue._prefetching is None
+
+
+@pytest.mark.asyncio
+async def test_prefetch_skips_backward_window_at_queue_start():
+    queue = make_queue(start_offset=1, selected_offset=30)
+    calls, _ = stub_more(queue)
+
+    queue.prefetch(20, 30)
+    assert queue._prefetching is None
+    assert calls == []
@@ -1,7 +1,14 @@
 from __future__ import annotations
 from datetime import timedelta
 
-from plexdlnaserver.utils import parse_timedelta
+import pytest
+
+from plexdlnaserver.utils import (
+    parse_root,
+    parse_scpd,
+    parse_timedelta,
+    parse_upnp_event,
+)
 
 
 def test_parse_timedelta():
@@ -9,5 +16,100 @@ def test_parse_timedelta():
     minutes = 34
     seconds = 56
     microseconds = 789
-    assert parse_timedelta(f"{hours}:{minutes}:{seconds}.{microseconds}") == timedelta(hours=hours,minutes=minutes, seconds=seconds, microseconds=microseconds)
+    assert parse_timedelta(f"{hours}:{minutes}:{seconds}.{microseconds}") == timedelta(hours=hours,minutes=minutes, seconds=seconds, microseconds=microseconds * 1000)
     assert parse_timedelta(f"{hours}:{minutes}:{seconds}") == timedelta(hours=hours,minutes=minutes, seconds=seconds)
+    assert parse_timedelta("0:03:07.5") == timedelta(
+        minutes=3, seconds=7, microseconds=500000
+    )
+    assert parse_timedelta("0:03:07.1234567") == timedelta(
+        minutes=3, seconds=7, microseconds=123456
+    )
+    assert parse_timedelta("00:00:00") == timedelta()
+
+
+def test_parse_timedelta_rejects_signs():
+    for value in ("-0:00:01", "0:-1:00", "0:00:+1", "0:00:01.-5"):
+        with pytest.raises(ValueError):
+            parse_timedelta(value)
+
+
+def test_parse_scpd():
+    xml = b"""<?xml version="1.0" encoding="utf-8"?>
+<scpd xmlns="urn:schemas-upnp-org:service-1-0">
+  <specVersion><major>1</major><minor>0</minor></specVersion>
+  <actionList>
+    <action>
+      <name>GetVolume</name>
+      <argumentList>
+        <argument><name>InstanceID</name><direction>in</direction></argument>
+        <argument><name>Channel</name><direction>in</direction></argument>
+      </argumentList>
+    </action>
+    <action><name>Stop</name></action>
+  </actionList>
+  <serviceStateTable>
+    <stateVariable sendEvents="no">
+      <name>Volume</name>
+      <dataType>ui2</dataType>
+      <allowedValueRange><minimum>0</minimum><maximum>30</maximum><step>1</step></allowedValueRange>
+    </stateVariable>
+  </serviceStateTable>
+</scpd>"""
+    spec = parse_scpd(xml)["scpd"]
+    get_volume, stop = spec["actionList"]["action"]
+    assert get_volume["name"] == "GetVolume"
+    assert [a["name"] for a in get_volume["argumentList"]["argument"]] == [
+        "InstanceID",
+        "Channel",
+    ]
+    assert stop == {"name": "Stop", "argumentList": {"argument": []}}
+    (volume,) = spec["serviceStateTable"]["stateVariable"]
+    assert volume["sendEvents"] == "no"
+    assert volume["allowedValueRange"] == {"minimum": "0", "maximum": "30", "step": "1"}
+
+
+def test_parse_root():
+    xml = b"""<?xml version="1.0"?>
+<root xmlns="urn:schemas-upnp-org:device-1-0" xmlns:dlna="urn:schemas-dlna-org:device-1-0">
+  <device>
+    <friendlyName>Kitchen</friendlyName>
+    <UDN>uuid:4e02d1d6</UDN>
+    <modelDescription/>
+    <dlna:X_DLNADOC>DMR-1.50</dlna:X_DLNADOC>
+    <serviceList>
+      <service>
+        <serviceType>urn:schemas-upnp-org:service:AVTransport:1</serviceType>
+        <controlURL>/AVTransport/control</controlURL>
+        <eventSubURL></eventSubURL>
+      </service>
+    </serviceList>
+  </device>
+</root>"""
+    device = parse_root(xml)["device"]
+    assert device["friendlyName"] == "Kitchen"
+    assert device["UDN"] == "uuid:4e02d1d6"
+    assert device["modelDescription"] is None
+    assert device["X_DLNADOC"] == "DMR-1.50"
+    assert device["serviceList"]["service"] == [
+        {
+            "serviceType": "urn:schemas-upnp-org:service:AVTransport:1",
+            "controlURL": "/AVTransport/control",
+            "eventSubURL": None,
+        }
+    ]
+
+
+def test_parse_upnp_event():
+    xml = b"""<?xml version="1.0"?>
+<e:propertyset xmlns:e="urn:schemas-upnp-org:event-1-0">
+  <e:property>
+    <LastChange>&lt;Event xmlns=&quot;urn:schemas-upnp-org:metadata-1-0/AVT/&quot;&gt;&lt;InstanceID val=&quot;0&quot;&gt;&lt;TransportState val=&quot;PLAYING&quot;/&gt;&lt;AVTransportURI val=&quot;http://pms/a?x=1&amp;amp;y=2&quot;/&gt;&lt;/InstanceID&gt;&lt;/Event&gt;</LastChange>
+  </e:property>
+</e:propertyset>"""
+    info = parse_upnp_event(xml)
+    assert info == {
+        "TransportState": "PLAYING",
+        "AVTransportURI": "http://pms/a?x=1&y=2",
+    }
+    empty = b'<e:propertyset xmlns:e="urn:schemas-upnp-org:event-1-0"/>'
+    assert parse_upnp_event(empty) is None